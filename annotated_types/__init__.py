@@ -304,7 +304,8 @@ class Unit(BaseMetadata):
 
     For indicating a quantity with a certain dimensionality but without a specific unit
     it is recommended to use square brackets, e.g. `Annotated[float, Unit('[time]')]`.
-    Note, however, ``annotated_types`` itself makes no use of the unit string.
+    Note, however, ``annotated_types`` itself makes no use of the unit string;
+    ``annotated_types.units`` offers an optional, dependency-free parser for simple cases.
     """
 
     unit: str
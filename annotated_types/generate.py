@@ -0,0 +1,347 @@
+"""
+Generate boundary-aware valid and invalid values from the constraints of an `Annotated` type.
+
+Candidates are derived from the flattened plan: the exact edges of `Gt`, `Ge`, `Lt` and `Le`,
+values either side of `MinLen` and `MaxLen`, aware and naive datetimes for `Timezone`, and
+multiples (and near-multiples) for `MultipleOf`. They are split into valid and invalid pools
+with `annotated_types.plan.validator`, and streams are sampled from the pools. For int and
+float annotations half of each valid sample is instead drawn at random from inside the bounds,
+so streams cover the interior of an interval as well as its edges.
+
+Candidates are coerced to the annotated type where they can be compared with its bounds,
+e.g. ``Annotated[int, Gt(0.5)]`` produces ints. Sized values longer than `MAX_LENGTH` are
+not generated, so very large `MaxLen` bounds have no values at the upper edge.
+Generated containers are shared between draws, and must not be mutated.
+"""
+import math
+import random
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Annotated, Any, get_args, get_origin
+
+from . import Ge, Gt, Le, Lt, MaxLen, MinLen, MultipleOf, Timezone, Unit
+from .plan import Plan, flatten, validator
+
+__all__ = ('ValueGenerator', 'generate', 'iter_values')
+
+_SIZED = (str, bytes, list, tuple, set, frozenset, dict)
+_DEFAULTS: dict[type[Any], tuple[Any, ...]] = {
+    int: (0, 1, -1, 1000, -1000),
+    float: (0.0, 0.5, -0.5, 1.0, -1.0, 1e9, -1e9, math.inf, -math.inf, math.nan),
+    Decimal: (Decimal(0), Decimal('0.5'), Decimal(-1), Decimal(1000)),
+    datetime: (datetime(2000, 1, 1), datetime(1970, 1, 1)),
+    date: (date(2000, 1, 1), date(1970, 1, 1)),
+}
+_ALPHABETS = ('a', 'A', '1', 'aB3', ' ', 'é')
+
+
+MAX_LENGTH = 10_000
+"""The longest str, bytes or container we generate."""
+_RANDOM_SPAN = 1000
+
+
+def _step(value: Any) -> Any:
+    """The smallest increment of ``value``'s type, or ``None`` for unordered types."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return 1
+    if isinstance(value, Decimal):
+        return Decimal(1).scaleb(min(value.as_tuple().exponent, 0) - 1)  # type: ignore[operator]
+    if isinstance(value, datetime):
+        return timedelta(microseconds=1)
+    if isinstance(value, date):
+        return timedelta(days=1)
+    return None
+
+
+def _around(value: Any) -> list[Any]:
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return [value]
+        return [value, math.nextafter(value, math.inf), math.nextafter(value, -math.inf), value + 1, value - 1]
+    step = _step(value)
+    if step is None:
+        return [value]
+    return [value, value + step, value - step, value + 10 * step, value - 10 * step]
+
+
+def _is_finite(value: 'int | float | Decimal') -> bool:
+    if isinstance(value, int):
+        return True
+    return value.is_finite() if isinstance(value, Decimal) else math.isfinite(value)
+
+
+def _coerce(value: Any, kind: type[Any]) -> list[Any]:
+    """``value`` as ``kind``, rounded both ways to an int if need be; raises `TypeError` if it can't be."""
+    if isinstance(value, kind) and not isinstance(value, bool) and (kind is not date or type(value) is date):
+        return [value]
+    if kind is int and isinstance(value, (float, Decimal)):
+        return [math.floor(value), math.ceil(value)] if _is_finite(value) else []
+    if kind is float and isinstance(value, (int, Decimal)):
+        try:
+            return [float(value)]
+        except OverflowError:
+            return [math.inf if value > 0 else -math.inf]
+    if kind is Decimal and isinstance(value, (int, float)):
+        return [Decimal(repr(value))] if _is_finite(value) else []
+    if kind is datetime and type(value) is date:
+        return [datetime.combine(value, time())]
+    if kind is date and isinstance(value, datetime):
+        return [value.date()]
+    raise TypeError(f'cannot coerce {value!r} to {kind.__name__}')
+
+
+def _comparable(value: Any, bound: Any) -> bool:
+    try:
+        value < bound
+    except TypeError:
+        return False
+    return True
+
+
+def _kind(base: Any, bounds: list[Any]) -> Any:
+    """The type to generate: the annotated type if it can be compared with the bounds, else the bounds' type."""
+    if base in _DEFAULTS:
+        coerced = [(_coerce_or_none(bound, base), bound) for bound in bounds]
+        if all(values is not None and all(_comparable(v, bound) for v in values) for values, bound in coerced):
+            return base
+    if bounds:
+        return type(bounds[0])
+    return base if base in _DEFAULTS else int
+
+
+def _coerce_or_none(value: Any, kind: type[Any]) -> 'list[Any] | None':
+    try:
+        return _coerce(value, kind)
+    except (TypeError, OverflowError):
+        return None
+
+
+def _bound(c: Any) -> Any:
+    if isinstance(c, Gt):
+        return c.gt
+    if isinstance(c, Ge):
+        return c.ge
+    if isinstance(c, Lt):
+        return c.lt
+    return c.le
+
+
+def _multiples(m: Any, anchor: Any) -> list[Any]:
+    try:
+        k = anchor // m
+        near = 1 if isinstance(m, int) else m / 2
+        return [k * m, (k + 1) * m, (k - 1) * m, k * m + near, (k + 1) * m - near]
+    except (TypeError, ValueError, ArithmeticError):
+        return []
+
+
+def _midpoint(lower: Any, upper: Any) -> list[Any]:
+    if isinstance(lower, int) and isinstance(upper, int):
+        return [(lower + upper) // 2]
+    try:
+        return [lower + (upper - lower) / 2]
+    except TypeError:
+        return []
+
+
+def _limits(kind: Any, constraints: Plan) -> tuple[Any, Any]:
+    """The tightest lower and upper bounds as ``kind``, or ``None`` where there are none."""
+    lower = [v for c in constraints if isinstance(c, (Gt, Ge)) for v in _coerce_or_none(_bound(c), kind) or ()]
+    upper = [v for c in constraints if isinstance(c, (Lt, Le)) for v in _coerce_or_none(_bound(c), kind) or ()]
+    return (max(lower) if lower else None), (min(upper) if upper else None)
+
+
+def _ordered_candidates(kind: Any, constraints: Plan) -> list[Any]:
+    bounds = [_bound(c) for c in constraints if isinstance(c, (Gt, Ge, Lt, Le))]
+    anchors = [a for bound in bounds for a in _coerce_or_none(bound, kind) or ()] or list(_DEFAULTS.get(kind, ()))
+    lower, upper = _limits(kind, constraints)
+    if lower is not None and upper is not None:
+        anchors += _midpoint(lower, upper)
+
+    raw = [c for anchor in anchors for c in _around(anchor)]
+    for c in constraints:
+        if isinstance(c, MultipleOf) and c.multiple_of:
+            raw += [v for anchor in anchors for v in _multiples(c.multiple_of, anchor)]
+    candidates = [v for c in raw for v in _coerce_or_none(c, kind) or ()]
+    for c in constraints:
+        if isinstance(c, Unit) and candidates:
+            # the magnitude is valid, the same quantity as a string is not
+            candidates.append(f'{candidates[0]}{c.unit}')
+    return candidates
+
+
+def _timezones(constraints: Plan) -> list[Any]:
+    tzs: list[Any] = [None, timezone.utc, timezone(timedelta(hours=6))]
+    for c in constraints:
+        if isinstance(c, Timezone) and c.tz is not None and c.tz is not Ellipsis:
+            tzs.append(timezone(timedelta(0), c.tz) if isinstance(c.tz, str) else c.tz)
+    return tzs
+
+
+def _with_timezones(candidates: list[Any], constraints: Plan) -> list[Any]:
+    tzs = _timezones(constraints)
+    out = []
+    for c in candidates:
+        if isinstance(c, datetime):
+            out += [c.replace(tzinfo=tz) for tz in tzs]
+        else:
+            out.append(c)
+    return out
+
+
+def _lengths(constraints: Plan) -> list[int]:
+    edges = [0, 1, 3]
+    for c in constraints:
+        if isinstance(c, MinLen):
+            edges.append(c.min_length)
+        elif isinstance(c, MaxLen):
+            edges.append(c.max_length)
+    return sorted({n for e in edges for n in (e - 1, e, e + 1) if 0 <= n <= MAX_LENGTH})
+
+
+def _items(tp: Any, n: int) -> list[Any]:
+    """``n`` distinct values of type ``tp``, or of int if we don't know how to make them."""
+    if tp is str:
+        return [str(i) for i in range(n)]
+    if tp is bytes:
+        return [str(i).encode() for i in range(n)]
+    if tp in (datetime, date):
+        return [_DEFAULTS[tp][0] + timedelta(days=i) for i in range(n)]
+    if tp in (float, Decimal):
+        return [tp(i) for i in range(n)]
+    return list(range(n))
+
+
+def _sized_candidates(base: Any, origin: Any, constraints: Plan) -> list[Any]:
+    args = get_args(base)
+    item = args[0] if args else int
+    value = args[1] if len(args) > 1 and origin is dict else int
+    factories: dict[Any, Callable[[int], list[Any]]] = {
+        str: lambda n: [a * n for a in _ALPHABETS],
+        bytes: lambda n: [b'a' * n],
+        list: lambda n: [_items(item, n)],
+        tuple: lambda n: [tuple(_items(item, n))],
+        set: lambda n: [set(_items(item, n))],
+        frozenset: lambda n: [frozenset(_items(item, n))],
+        dict: lambda n: [dict.fromkeys(_items(item, n), _items(value, 1)[0])],
+    }
+    make = factories.get(origin, factories[str])
+    return [v for n in _lengths(constraints) for v in make(n)]
+
+
+def _is_sized(origin: Any, constraints: Plan) -> bool:
+    return origin in _SIZED or any(isinstance(c, (MinLen, MaxLen)) for c in constraints)
+
+
+def _ordered_kind(base: Any, constraints: Plan) -> Any:
+    return _kind(base, [_bound(c) for c in constraints if isinstance(c, (Gt, Ge, Lt, Le))])
+
+
+def _random_range(base: Any, constraints: Plan) -> 'tuple[Any, Any] | None':
+    """The interval to draw random ints or floats from, if the annotation is a number."""
+    if _is_sized(get_origin(base) or base, constraints):
+        return None
+    kind = _ordered_kind(base, constraints)
+    if kind not in (int, float):
+        return None
+    lower, upper = _limits(kind, constraints)
+    if lower is None and upper is None:
+        lower, upper = kind(-_RANDOM_SPAN), kind(_RANDOM_SPAN)
+    elif lower is None:
+        lower = upper - _RANDOM_SPAN
+    elif upper is None:
+        upper = lower + _RANDOM_SPAN
+    if not (_is_finite(lower) and _is_finite(upper)) or lower > upper:
+        return None
+    return lower, upper
+
+
+def _candidates(annotation: Any, constraints: Plan) -> list[Any]:
+    base = get_args(annotation)[0] if get_origin(annotation) is Annotated else annotation
+    origin = get_origin(base) or base
+    if _is_sized(origin, constraints):
+        return _sized_candidates(base, origin, constraints)
+    candidates = _ordered_candidates(_ordered_kind(base, constraints), constraints)
+    if origin is datetime or any(isinstance(c, Timezone) for c in constraints):
+        if not any(isinstance(c, datetime) for c in candidates):
+            candidates += list(_DEFAULTS[datetime])
+        candidates = _with_timezones(candidates, constraints)
+    return candidates
+
+
+def _dedupe(values: list[Any]) -> tuple[Any, ...]:
+    seen: set[tuple[type[Any], str]] = set()
+    out = []
+    for v in values:
+        key = (type(v), repr(v))
+        if key not in seen:
+            seen.add(key)
+            out.append(v)
+    return tuple(out)
+
+
+@dataclass(frozen=True, slots=True)
+class ValueGenerator:
+    """Pools of valid and invalid values for an annotation, sampled with a seedable RNG.
+
+    For int and float annotations, ``random_range`` is the interval (clamped to the bounds,
+    or 1000 either side of them if unbounded) that half of each valid sample is drawn
+    from uniformly; these draws are filtered by the validator, so e.g. `MultipleOf` holds.
+    """
+
+    annotation: Any
+    valid_values: tuple[Any, ...]
+    invalid_values: tuple[Any, ...]
+    random_range: 'tuple[Any, Any] | None' = None
+
+    @classmethod
+    def from_annotation(cls, annotation: Any) -> 'ValueGenerator':
+        check = validator(annotation)
+        constraints = flatten(annotation)
+        candidates = _dedupe(_candidates(annotation, constraints))
+        base = get_args(annotation)[0] if get_origin(annotation) is Annotated else annotation
+        return cls(
+            annotation,
+            tuple(c for c in candidates if check(c)),
+            tuple(c for c in candidates if not check(c)),
+            _random_range(base, constraints),
+        )
+
+    def sample(self, n: int, *, valid: bool = True, rng: 'random.Random | None' = None) -> list[Any]:
+        """Draw ``n`` values, raising `ValueError` if we found no candidates of the requested kind."""
+        pool = self.valid_values if valid else self.invalid_values
+        if not pool:
+            raise ValueError(f'could not generate {"valid" if valid else "invalid"} values for {self.annotation!r}')
+        rng = rng or random.Random()
+        if not valid or self.random_range is None:
+            return rng.choices(pool, k=n)
+        values = self._random(n // 2, rng)
+        values += rng.choices(pool, k=n - len(values))
+        rng.shuffle(values)
+        return values
+
+    def _random(self, n: int, rng: random.Random) -> list[Any]:
+        assert self.random_range is not None
+        lower, upper = self.random_range
+        draw = rng.randint if isinstance(lower, int) else rng.uniform
+        check = validator(self.annotation)
+        return [v for v in [draw(lower, upper) for _ in range(n)] if check(v)]
+
+
+def generate(annotation: Any, n: int, *, valid: bool = True, seed: 'int | None' = None) -> list[Any]:
+    """Generate ``n`` valid (or invalid) values for ``annotation``."""
+    return ValueGenerator.from_annotation(annotation).sample(n, valid=valid, rng=random.Random(seed))
+
+
+def iter_values(
+    annotation: Any, *, valid: bool = True, seed: 'int | None' = None, batch_size: int = 65536
+) -> Iterator[Any]:
+    """An endless stream of valid (or invalid) values for ``annotation``."""
+    generator = ValueGenerator.from_annotation(annotation)
+    rng = random.Random(seed)
+    while True:
+        yield from generator.sample(batch_size, valid=valid, rng=rng)
@@ -0,0 +1,506 @@
+"""
+Flattened constraint plans for `Annotated` types, a compact serialization format and a
+thread-safe cache for them, and a reference `Validator` compiled from them.
+
+A *plan* is the tuple of `BaseMetadata` constraints found on an `Annotated` type after
+unpacking any `GroupedMetadata` (and ``slice`` shorthand for `Len`), in declaration order.
+Unrecognised metadata, such as `doc`, is dropped.
+"""
+import json
+import math
+import threading
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Annotated, Any, Generic, TypeVar, get_args, get_origin
+
+from . import BaseMetadata, Ge, Gt, Le, Len, Lt, MaxLen, MinLen, MultipleOf, Not, Predicate, Timezone, Unit, __version__
+
+__all__ = (
+    'Plan',
+    'flatten',
+    'dumps',
+    'loads',
+    'PlanCache',
+    'KNOWN_PREDICATES',
+    'Validator',
+    'validator',
+    'clear_validator_cache',
+    'VALIDATOR_CACHE_SIZE',
+    'validate_many',
+    'FailureReport',
+    'FAILED',
+    'ERRORED',
+)
+
+Plan = tuple[BaseMetadata, ...]
+T = TypeVar('T')
+
+FORMAT_VERSION = 1
+
+KNOWN_PREDICATES: dict[str, Callable[[Any], bool]] = {
+    'str.islower': str.islower,
+    'str.isupper': str.isupper,
+    'str.isdigit': str.isdigit,
+    'str.isascii': str.isascii,
+    'math.isfinite': math.isfinite,
+    'math.isnan': math.isnan,
+    'math.isinf': math.isinf,
+}
+"""Predicates which can be serialized, by qualified name."""
+
+_PREDICATE_NAMES = {func: name for name, func in KNOWN_PREDICATES.items()}
+
+
+class _StripedLock:
+    """A fixed set of locks, one of which is picked by the hash of a key."""
+
+    __slots__ = ('_locks',)
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+
+    def get(self, key: object) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+def _unpack(metadata: Iterable[object]) -> Iterator[BaseMetadata]:
+    for arg in metadata:
+        if isinstance(arg, BaseMetadata):
+            yield arg
+        elif getattr(arg, '__is_annotated_types_grouped_metadata__', False) is True:
+            # equivalent to isinstance(arg, GroupedMetadata), without the slow runtime protocol check
+            yield from _unpack(arg)  # type: ignore[arg-type]
+        elif isinstance(arg, slice):
+            yield from Len(arg.start or 0, arg.stop)
+
+
+def flatten(annotation: Any) -> Plan:
+    """Return the flattened constraints of ``Annotated[T, ...]``, or ``()`` for any other type."""
+    if get_origin(annotation) is not Annotated:
+        return ()
+    return tuple(_unpack(get_args(annotation)[1:]))
+
+
+def _encode_value(value: Any) -> Any:
+    # order matters: bool is an int, datetime is a date
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return {'decimal': str(value)}
+    if isinstance(value, datetime):
+        return {'datetime': value.replace(tzinfo=None).isoformat(), 'tz': _encode_tz(value.tzinfo)}
+    if isinstance(value, date):
+        return {'date': value.isoformat()}
+    if isinstance(value, time) and value.tzinfo is None:
+        return {'time': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {'timedelta': [value.days, value.seconds, value.microseconds]}
+    raise TypeError(f'cannot serialize value {value!r}')
+
+
+def _decode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if not isinstance(value, dict):
+        raise ValueError(f'unknown value encoding {value!r}')
+    if 'decimal' in value:
+        return Decimal(_expect(value['decimal'], str))
+    if 'datetime' in value:
+        return datetime.fromisoformat(_expect(value['datetime'], str)).replace(tzinfo=_decode_tz(value['tz']))
+    if 'date' in value:
+        return date.fromisoformat(_expect(value['date'], str))
+    if 'time' in value:
+        return time.fromisoformat(_expect(value['time'], str))
+    if 'timedelta' in value:
+        return timedelta(*_expect(value['timedelta'], list))
+    raise ValueError(f'unknown value encoding {value!r}')
+
+
+def _expect(value: Any, tp: type[Any]) -> Any:
+    if not isinstance(value, tp) or isinstance(value, bool) and tp is int:
+        raise ValueError(f'expected {tp.__name__}, got {value!r}')
+    return value
+
+
+def _decode_length(value: Any) -> int:
+    if _expect(value, int) < 0:
+        raise ValueError(f'expected a non-negative length, got {value!r}')
+    return value
+
+
+def _encode_tz(tz: Any) -> Any:
+    if tz is None or isinstance(tz, str):
+        return tz
+    if tz is Ellipsis:
+        return {'any': True}
+    if isinstance(tz, timezone):
+        offset = tz.utcoffset(None)
+        return {'offset': [offset.days, offset.seconds, offset.microseconds], 'name': tz.tzname(None)}
+    key = getattr(tz, 'key', None)  # zoneinfo.ZoneInfo
+    if isinstance(key, str) and type(tz).__module__ == 'zoneinfo':
+        return {'zoneinfo': key}
+    raise TypeError(f'cannot serialize timezone {tz!r}')
+
+
+def _decode_tz(tz: Any) -> Any:
+    if tz is None or isinstance(tz, str):
+        return tz
+    if not isinstance(tz, dict):
+        raise ValueError(f'unknown timezone encoding {tz!r}')
+    if 'any' in tz:
+        return ...
+    if 'offset' in tz:
+        return timezone(timedelta(*_expect(tz['offset'], list)), _expect(tz['name'], str))
+    if 'zoneinfo' in tz:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(_expect(tz['zoneinfo'], str))
+    raise ValueError(f'unknown timezone encoding {tz!r}')
+
+
+def _encode_predicate(func: Callable[[Any], bool]) -> str:
+    if isinstance(func, Not):
+        return f'not {_encode_predicate(func.func)}'
+    try:
+        return _PREDICATE_NAMES[func]
+    except (KeyError, TypeError):
+        raise TypeError(f'cannot serialize predicate {func!r}, only {", ".join(KNOWN_PREDICATES)} are supported')
+
+
+def _decode_predicate(name: Any) -> Callable[[Any], bool]:
+    if _expect(name, str).startswith('not '):
+        return Not(_decode_predicate(name[4:]))
+    return KNOWN_PREDICATES[name]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# constraint type -> (field name, encoder, decoder)
+_CODECS: dict[type[BaseMetadata], tuple[str, Callable[[Any], Any], Callable[[Any], Any]]] = {
+    Gt: ('gt', _encode_value, _decode_value),
+    Ge: ('ge', _encode_value, _decode_value),
+    Lt: ('lt', _encode_value, _decode_value),
+    Le: ('le', _encode_value, _decode_value),
+    MultipleOf: ('multiple_of', _encode_value, _decode_value),
+    MinLen: ('min_length', _identity, _decode_length),
+    MaxLen: ('max_length', _identity, _decode_length),
+    Timezone: ('tz', _encode_tz, _decode_tz),
+    Unit: ('unit', _identity, lambda v: _expect(v, str)),
+    Predicate: ('func', _encode_predicate, _decode_predicate),
+}
+_DECODERS: dict[str, tuple[Callable[[Any], BaseMetadata], Callable[[Any], Any]]] = {
+    cls.__name__: (cls, decode) for cls, (_, _, decode) in _CODECS.items()
+}
+
+
+def _encode_constraint(constraint: BaseMetadata) -> list[Any]:
+    try:
+        field_name, encode, _ = _CODECS[type(constraint)]
+    except KeyError:
+        raise TypeError(f'cannot serialize constraint {constraint!r}') from None
+    return [type(constraint).__name__, encode(getattr(constraint, field_name))]
+
+
+def _decode_constraint(kind: Any, value: Any) -> BaseMetadata:
+    try:
+        cls, decode = _DECODERS[kind]
+    except (KeyError, TypeError):
+        raise ValueError(f'unknown constraint {kind!r}') from None
+    return cls(decode(value))
+
+
+def _encode_plan(plan: Plan) -> list[Any]:
+    return [_encode_constraint(c) for c in plan]
+
+
+def _decode_plan(constraints: Any) -> Plan:
+    try:
+        return tuple(_decode_constraint(kind, value) for kind, value in constraints)
+    except Exception as e:
+        raise ValueError(f'malformed plan: {e!r}') from e
+
+
+def dumps(plan: Plan) -> bytes:
+    """Serialize a plan, raising `TypeError` if it contains values or predicates we can't represent."""
+    return json.dumps([FORMAT_VERSION, __version__, _encode_plan(plan)], separators=(',', ':')).encode()
+
+
+def loads(data: bytes) -> Plan:
+    """Deserialize a plan written by `dumps`.
+
+    Raises `ValueError` if the data is malformed or was written by a different
+    version of `annotated_types`.
+    """
+    try:
+        format_version, version, constraints = json.loads(data)
+    except Exception as e:
+        raise ValueError(f'malformed plan: {e!r}') from e
+    if format_version != FORMAT_VERSION or version != __version__:
+        raise ValueError(f'plan was written by annotated_types {version!r}, format {format_version!r}')
+    return _decode_plan(constraints)
+
+
+class _StripedCache(Generic[T]):
+    """A thread-safe, in-memory cache keyed by annotation, holding at most ``maxsize`` entries.
+
+    Hits don't lock, and misses only lock one of a fixed set of stripes, so unrelated
+    annotations are built in parallel. When full, the oldest entry is evicted. Annotations
+    with unhashable metadata are built on every lookup.
+    """
+
+    def __init__(self, maxsize: 'int | None' = None) -> None:
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError(f'maxsize must be positive or None, not {maxsize!r}')
+        self.maxsize = maxsize
+        self._entries: dict[Any, T] = {}
+        self._locks = _StripedLock()
+        self._evict_lock = threading.Lock()
+
+    def _build(self, annotation: Any) -> T:
+        raise NotImplementedError
+
+    def get(self, annotation: Any) -> T:
+        try:
+            return self._entries[annotation]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable metadata
+            return self._build(annotation)
+        with self._locks.get(annotation):
+            entry = self._entries.get(annotation)
+            if entry is None:
+                entry = self._build(annotation)
+                if self.maxsize is not None and len(self._entries) >= self.maxsize:
+                    with self._evict_lock:
+                        entries = self._entries
+                        if entries:
+                            del entries[next(iter(entries))]
+                self._entries[annotation] = entry
+        return entry
+
+    def clear(self) -> None:
+        self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PlanCache(_StripedCache[Plan]):
+    """A thread-safe, in-memory cache of flattened plans, keyed by annotation.
+
+    Plans are immutable, so a cache populated before forking worker processes is inherited
+    by each of them; it is not shared memory, as reference counting copies the pages a
+    worker touches. Hits don't lock, and misses only lock one of a fixed set of stripes.
+    With a ``maxsize``, the oldest plan is evicted when the cache is full. Annotations with
+    unhashable metadata are flattened on every lookup.
+    """
+
+    def _build(self, annotation: Any) -> Plan:
+        return flatten(annotation)
+
+
+def _check_gt(c: Gt) -> Callable[[Any], bool]:
+    gt = c.gt
+    return lambda v: v > gt
+
+
+def _check_ge(c: Ge) -> Callable[[Any], bool]:
+    ge = c.ge
+    return lambda v: v >= ge
+
+
+def _check_lt(c: Lt) -> Callable[[Any], bool]:
+    lt = c.lt
+    return lambda v: v < lt
+
+
+def _check_le(c: Le) -> Callable[[Any], bool]:
+    le = c.le
+    return lambda v: v <= le
+
+
+def _check_multiple_of(c: MultipleOf) -> Callable[[Any], bool]:
+    multiple_of = c.multiple_of
+    return lambda v: v % multiple_of == 0
+
+
+def _check_min_len(c: MinLen) -> Callable[[Any], bool]:
+    min_length = c.min_length
+    return lambda v: len(v) >= min_length
+
+
+def _check_max_len(c: MaxLen) -> Callable[[Any], bool]:
+    max_length = c.max_length
+    return lambda v: len(v) <= max_length
+
+
+def _check_timezone(c: Timezone) -> Callable[[Any], bool]:
+    tz = c.tz
+    if tz is None:
+        return lambda v: isinstance(v, datetime) and v.tzinfo is None
+    if tz is Ellipsis:
+        return lambda v: isinstance(v, datetime) and v.tzinfo is not None
+    if isinstance(tz, str):
+        return lambda v: isinstance(v, datetime) and v.tzinfo is not None and v.tzname() == tz
+    return lambda v: isinstance(v, datetime) and v.tzinfo is not None and v.tzinfo == tz
+
+
+def _check_unit(c: Unit) -> Callable[[Any], bool]:
+    return lambda v: isinstance(v, (int, float))
+
+
+def _check_predicate(c: Predicate) -> Callable[[Any], bool]:
+    return c.func
+
+
+_CHECKS: dict[type[Any], Callable[[Any], Callable[[Any], bool]]] = {
+    Gt: _check_gt,
+    Ge: _check_ge,
+    Lt: _check_lt,
+    Le: _check_le,
+    MultipleOf: _check_multiple_of,
+    MinLen: _check_min_len,
+    MaxLen: _check_max_len,
+    Timezone: _check_timezone,
+    Unit: _check_unit,
+    Predicate: _check_predicate,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Validator:
+    """An immutable, compiled plan; ``validator(value)`` is True if ``value`` meets every constraint.
+
+    This is a reference interpretation of the metadata, the same as the one in our test suite:
+    `MultipleOf` uses Python semantics, `Timezone` strings are compared with ``tzname()``,
+    `Unit` only requires a number, and a check raising an exception makes the value invalid.
+    Unknown subclasses of `BaseMetadata` are ignored.
+    """
+
+    constraints: Plan
+    checks: tuple[Callable[[Any], bool], ...]
+
+    @classmethod
+    def from_plan(cls, constraints: Plan) -> 'Validator':
+        checks = tuple(_CHECKS[type(c)](c) if type(c) in _CHECKS else _always for c in constraints)
+        return cls(constraints, checks)
+
+    def __call__(self, value: Any) -> bool:
+        try:
+            for check in self.checks:
+                if not check(value):
+                    return False
+        except Exception:
+            return False
+        return True
+
+    def collect_failures(self, values: Iterable[Any], *, all_constraints: bool = False) -> 'FailureReport':
+        """Validate ``values``, recording failures in a `FailureReport` rather than raising.
+
+        By default only the first failing constraint of each value is recorded.
+        """
+        report = FailureReport(self.constraints)
+        add_index, add_id, add_reason = report.indices.append, report.constraint_ids.append, report.reasons.append
+        checks = tuple(enumerate(self.checks))
+        for index, value in enumerate(values):
+            for constraint_id, check in checks:
+                try:
+                    if check(value):
+                        continue
+                    reason = FAILED
+                except Exception:
+                    reason = ERRORED
+                add_index(index)
+                add_id(constraint_id)
+                add_reason(reason)
+                if not all_constraints:
+                    break
+        return report
+
+
+FAILED = 0
+"""Reason code: the constraint's check returned a falsy value."""
+ERRORED = 1
+"""Reason code: the constraint's check raised an exception, e.g. on comparing a str with an int."""
+_REASONS = {FAILED: 'failed', ERRORED: 'could not be checked against'}
+
+
+@dataclass(slots=True)
+class FailureReport:
+    """Failures from `Validator.collect_failures`, as parallel arrays.
+
+    ``indices[n]`` is the position of the failing value, ``constraint_ids[n]`` the position
+    of the constraint it failed in ``constraints``, and ``reasons[n]`` its reason code.
+    Messages are only rendered when asked for.
+    """
+
+    constraints: Plan
+    indices: 'array[int]' = field(default_factory=lambda: array('q'))
+    constraint_ids: 'array[int]' = field(default_factory=lambda: array('I'))
+    reasons: 'array[int]' = field(default_factory=lambda: array('B'))
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def counts(self) -> list[int]:
+        """The number of failures of each constraint, in the order of ``constraints``."""
+        counts = [0] * len(self.constraints)
+        for constraint_id in self.constraint_ids:
+            counts[constraint_id] += 1
+        return counts
+
+    def message(self, n: int) -> str:
+        reason = _REASONS[self.reasons[n]]
+        return f'value {self.indices[n]} {reason} {self.constraints[self.constraint_ids[n]]!r}'
+
+    def messages(self) -> Iterator[str]:
+        return (self.message(n) for n in range(len(self)))
+
+
+def _always(_: Any) -> bool:
+    return True
+
+
+class _ValidatorCache(_StripedCache[Validator]):
+    def _build(self, annotation: Any) -> Validator:
+        return Validator.from_plan(flatten(annotation))
+
+
+VALIDATOR_CACHE_SIZE = 4096
+"""The most validators `validator` keeps, evicting the oldest when full."""
+_validators = _ValidatorCache(VALIDATOR_CACHE_SIZE)
+
+
+def validator(annotation: Any) -> Validator:
+    """Return the compiled `Validator` for ``annotation``, cached if the annotation is hashable."""
+    return _validators.get(annotation)
+
+
+def clear_validator_cache() -> None:
+    """Drop every validator cached by `validator`."""
+    _validators.clear()
+
+
+def validate_many(
+    annotation: Any, values: Sequence[Any], *, max_workers: 'int | None' = None, chunk_size: int = 4096
+) -> list[bool]:
+    """Validate ``values`` against ``annotation`` in chunks on a thread pool.
+
+    Validators share no mutable state, so on free-threaded builds of Python this scales
+    with the number of cores; with the GIL it is no faster than a loop.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f'chunk_size must be positive, not {chunk_size!r}')
+    check = validator(annotation)
+    if len(values) <= chunk_size:
+        return [check(v) for v in values]
+    chunks = [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda chunk: [check(v) for v in chunk], chunks)
+        return [r for chunk_results in results for r in chunk_results]
@@ -0,0 +1,269 @@
+"""
+An optional, dependency-free parser for `Unit` strings.
+
+Units are parsed into a vector of exponents of the seven SI base dimensions and a scale
+factor to SI base units, e.g. ``'km/h'`` is ``length * time**-1`` with a scale of ``1/3.6``.
+Dimensions written in square brackets, e.g. ``'[length]/[time]'``, have no scale.
+
+Supported syntax is products (``*``, ``.``, ``·`` or a space), quotients (``/``), powers
+(``^2``, ``**2`` or ``m2``, but not ``m 2``) and parentheses, over the units in `UNITS` with an optional
+SI prefix. Symbols must be separated unless they are listed as one unit, so ``'kWh'``
+and ``'mAh'`` work (``Wh`` and ``Ah`` are units) but ``'Nm'`` must be written ``'N m'``.
+Units with an offset, such as degrees Celsius, are not supported.
+The most recently used parsed units and conversion factors are cached, so repeated strings
+are rarely parsed more than once.
+"""
+import re
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Union
+
+from . import Unit
+
+__all__ = (
+    'DIMENSIONS',
+    'UNITS',
+    'PREFIXES',
+    'ParsedUnit',
+    'parse_unit',
+    'is_compatible',
+    'conversion_factor',
+    'convert',
+    'convert_array',
+)
+
+DIMENSIONS = ('length', 'mass', 'time', 'current', 'temperature', 'substance', 'luminosity')
+
+Dimensions = tuple[int, int, int, int, int, int, int]
+
+
+def _dims(**exponents: int) -> Dimensions:
+    return tuple(exponents.get(name, 0) for name in DIMENSIONS)  # type: ignore[return-value]
+
+
+UNITS: dict[str, tuple[Dimensions, float]] = {
+    # SI base units, the kilogram is spelled with a prefix
+    'm': (_dims(length=1), 1.0),
+    'g': (_dims(mass=1), 1e-3),
+    's': (_dims(time=1), 1.0),
+    'A': (_dims(current=1), 1.0),
+    'K': (_dims(temperature=1), 1.0),
+    'mol': (_dims(substance=1), 1.0),
+    'cd': (_dims(luminosity=1), 1.0),
+    # derived units
+    'Hz': (_dims(time=-1), 1.0),
+    'N': (_dims(mass=1, length=1, time=-2), 1.0),
+    'Pa': (_dims(mass=1, length=-1, time=-2), 1.0),
+    'J': (_dims(mass=1, length=2, time=-2), 1.0),
+    'W': (_dims(mass=1, length=2, time=-3), 1.0),
+    'Wh': (_dims(mass=1, length=2, time=-2), 3600.0),
+    'C': (_dims(current=1, time=1), 1.0),
+    'Ah': (_dims(current=1, time=1), 3600.0),
+    'V': (_dims(mass=1, length=2, time=-3, current=-1), 1.0),
+    'ohm': (_dims(mass=1, length=2, time=-3, current=-2), 1.0),
+    'Ω': (_dims(mass=1, length=2, time=-3, current=-2), 1.0),
+    # non-SI units
+    'min': (_dims(time=1), 60.0),
+    'h': (_dims(time=1), 3600.0),
+    'day': (_dims(time=1), 86400.0),
+    'L': (_dims(length=3), 1e-3),
+    't': (_dims(mass=1), 1e3),
+    'bar': (_dims(mass=1, length=-1, time=-2), 1e5),
+    'eV': (_dims(mass=1, length=2, time=-2), 1.602176634e-19),
+    'in': (_dims(length=1), 0.0254),
+    'ft': (_dims(length=1), 0.3048),
+    'mi': (_dims(length=1), 1609.344),
+    'lb': (_dims(mass=1), 0.45359237),
+}
+"""Known unit symbols, mapped to their dimensions and scale to SI base units."""
+
+PREFIXES: dict[str, float] = {
+    'Y': 1e24,
+    'Z': 1e21,
+    'E': 1e18,
+    'P': 1e15,
+    'T': 1e12,
+    'G': 1e9,
+    'M': 1e6,
+    'k': 1e3,
+    'h': 1e2,
+    'da': 1e1,
+    'd': 1e-1,
+    'c': 1e-2,
+    'm': 1e-3,
+    'u': 1e-6,
+    'µ': 1e-6,
+    'μ': 1e-6,
+    'n': 1e-9,
+    'p': 1e-12,
+    'f': 1e-15,
+    'a': 1e-18,
+    'z': 1e-21,
+    'y': 1e-24,
+}
+
+_DIMENSIONLESS: Dimensions = _dims()
+_TOKEN = re.compile(r'\s*(\*\*|[*/^().·]|\[\w+\]|[^\W\d_]+|-?\d+)')
+
+UnitLike = Union[str, Unit]
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedUnit:
+    """A unit as exponents of `DIMENSIONS` and a scale to SI base units.
+
+    ``scale`` is ``None`` for units given only as a dimension, e.g. ``'[time]'``.
+    """
+
+    dimensions: Dimensions
+    scale: 'float | None'
+
+    def __mul__(self, other: 'ParsedUnit') -> 'ParsedUnit':
+        dimensions = tuple(a + b for a, b in zip(self.dimensions, other.dimensions))
+        scale = None if self.scale is None or other.scale is None else self.scale * other.scale
+        return ParsedUnit(dimensions, scale)  # type: ignore[arg-type]
+
+    def __pow__(self, exponent: int) -> 'ParsedUnit':
+        dimensions = tuple(a * exponent for a in self.dimensions)
+        return ParsedUnit(dimensions, None if self.scale is None else self.scale**exponent)  # type: ignore[arg-type]
+
+
+_ONE = ParsedUnit(_DIMENSIONLESS, 1.0)
+
+
+def _symbol(name: str) -> ParsedUnit:
+    if name in UNITS:
+        return ParsedUnit(*UNITS[name])
+    for prefix in ('da', name[:1]):
+        if name.startswith(prefix) and name[len(prefix) :] in UNITS and prefix in PREFIXES:
+            dimensions, scale = UNITS[name[len(prefix) :]]
+            return ParsedUnit(dimensions, PREFIXES[prefix] * scale)
+    raise ValueError(f'unknown unit {name!r}')
+
+
+class _Parser:
+    def __init__(self, unit: str) -> None:
+        self.unit = unit
+        self.tokens: list[str] = []
+        # whether each token directly follows the previous one, so ``'m2'`` is m² but ``'m 2'`` is an error
+        self.adjacent: list[bool] = []
+        pos = 0
+        while pos < len(unit.rstrip()):
+            match = _TOKEN.match(unit, pos)
+            if match is None:
+                raise ValueError(f'invalid unit {unit!r} at position {pos}')
+            self.tokens.append(match.group(1))
+            self.adjacent.append(match.start(1) == pos)
+            pos = match.end()
+        self.pos = 0
+
+    def peek(self) -> 'str | None':
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ValueError(f'unexpected end of unit {self.unit!r}')
+        self.pos += 1
+        return token
+
+    def parse(self) -> ParsedUnit:
+        result = self.expr()
+        if self.peek() is not None:
+            raise ValueError(f'unexpected {self.peek()!r} in unit {self.unit!r}')
+        return result
+
+    def expr(self) -> ParsedUnit:
+        result = self.factor()
+        while (token := self.peek()) is not None and token != ')':
+            if token == '/':
+                self.take()
+                result = result * self.factor() ** -1
+            else:
+                if token in ('*', '.', '·'):
+                    self.take()
+                result = result * self.factor()
+        return result
+
+    def factor(self) -> ParsedUnit:
+        result = self.atom()
+        token = self.peek()
+        if token in ('^', '**'):
+            self.take()
+            token = self.peek()
+            if token is None or not token.lstrip('-').isdigit():
+                raise ValueError(f'expected an integer exponent in unit {self.unit!r}')
+        elif token is not None and token.lstrip('-').isdigit():
+            if not self.adjacent[self.pos]:
+                raise ValueError(f'unexpected {token!r} in unit {self.unit!r}, write exponents as ^{token}')
+        if token is not None and token.lstrip('-').isdigit():
+            self.take()
+            result = result ** int(token)
+        return result
+
+    def atom(self) -> ParsedUnit:
+        token = self.take()
+        if token == '(':
+            result = self.expr()
+            if self.take() != ')':  # pragma: no cover
+                raise ValueError(f'unbalanced parentheses in unit {self.unit!r}')
+            return result
+        if token == '1':
+            return _ONE
+        if token.startswith('['):
+            if token[1:-1] not in DIMENSIONS:
+                raise ValueError(f'unknown dimension {token!r}, expected one of {", ".join(DIMENSIONS)}')
+            return ParsedUnit(_dims(**{token[1:-1]: 1}), None)
+        if token[0].isalpha():
+            return _symbol(token)
+        raise ValueError(f'unexpected {token!r} in unit {self.unit!r}')
+
+
+def _unit_str(unit: UnitLike) -> str:
+    return unit.unit if isinstance(unit, Unit) else unit
+
+
+@lru_cache(maxsize=1024)
+def _parse(unit: str) -> ParsedUnit:
+    if not unit.strip():
+        return _ONE
+    return _Parser(unit).parse()
+
+
+def parse_unit(unit: UnitLike) -> ParsedUnit:
+    """Parse a unit string or `Unit`, raising `ValueError` if it isn't understood."""
+    return _parse(_unit_str(unit))
+
+
+def is_compatible(a: UnitLike, b: UnitLike) -> bool:
+    """Whether ``a`` and ``b`` have the same dimensions, e.g. ``'km/h'`` and ``'[length]/[time]'``."""
+    return parse_unit(a).dimensions == parse_unit(b).dimensions
+
+
+@lru_cache(maxsize=1024)
+def _conversion_factor(a: str, b: str) -> float:
+    source, target = _parse(a), _parse(b)
+    if source.dimensions != target.dimensions:
+        raise ValueError(f'cannot convert {a!r} to {b!r}, their dimensions differ')
+    if source.scale is None or target.scale is None:
+        raise ValueError(f'cannot convert {a!r} to {b!r} without a scale')
+    return source.scale / target.scale
+
+
+def conversion_factor(source: UnitLike, target: UnitLike) -> float:
+    """The factor to multiply a magnitude in ``source`` units by to get ``target`` units."""
+    return _conversion_factor(_unit_str(source), _unit_str(target))
+
+
+def convert(values: Iterable[float], source: UnitLike, target: UnitLike) -> list[float]:
+    """Convert magnitudes from ``source`` to ``target`` units."""
+    factor = conversion_factor(source, target)
+    return [v * factor for v in values]
+
+
+def convert_array(values: 'array[float]', source: UnitLike, target: UnitLike) -> 'array[float]':
+    """Convert a float `array.array` of magnitudes to a new array of the same type."""
+    factor = conversion_factor(source, target)
+    return array(values.typecode, [v * factor for v in values])
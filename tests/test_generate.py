@@ -0,0 +1,132 @@
+import math
+import random
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated
+
+import pytest
+
+import annotated_types as at
+from annotated_types.generate import MAX_LENGTH, ValueGenerator, generate, iter_values
+from annotated_types.plan import validator
+from annotated_types.test_cases import Case, cases
+
+
+@pytest.mark.parametrize('case', list(cases()), ids=lambda case: str(case.annotation))
+def test_generated_values(case: Case) -> None:
+    generator = ValueGenerator.from_annotation(case.annotation)
+    check = validator(case.annotation)
+    assert generator.valid_values
+    assert all(check(v) for v in generator.valid_values)
+    assert not any(check(v) for v in generator.invalid_values)
+
+
+@pytest.mark.parametrize(
+    'annotation, valid, invalid',
+    [
+        (Annotated[int, at.Gt(4)], [5], [4]),
+        (Annotated[int, at.Ge(4)], [4], [3]),
+        (Annotated[float, at.Lt(0.5)], [math.nextafter(0.5, 0)], [0.5]),
+        (Annotated[float, at.Le(0.5)], [0.5], [math.nextafter(0.5, 1)]),
+        (Annotated[Decimal, at.Gt(Decimal('1.12'))], [Decimal('1.121')], [Decimal('1.12')]),
+        (
+            Annotated[datetime, at.Lt(datetime(2000, 1, 1))],
+            [datetime(1999, 12, 31, 23, 59, 59, 999999)],
+            [datetime(2000, 1, 1)],
+        ),
+        (Annotated[float, at.Gt(0)], [math.nextafter(0, math.inf)], [0.0]),
+        (Annotated[int, at.Gt(0.5)], [1], [0]),
+        (Annotated[Decimal, at.Le(1)], [Decimal(1)], [Decimal('1.1')]),
+        (Annotated[int, at.MultipleOf(3), at.Interval(ge=0, lt=10)], [0, 3, 9], [1, 10]),
+        (Annotated[str, at.Len(2, 4)], ['aa', 'aaaa'], ['a', 'aaaaa']),
+        (Annotated[list[int], at.Len(2, 4)], [[0, 1], [0, 1, 2, 3]], [[0], [0, 1, 2, 3, 4]]),
+    ],
+)
+def test_boundaries(annotation: object, valid: list[object], invalid: list[object]) -> None:
+    generator = ValueGenerator.from_annotation(annotation)
+    for v in valid:
+        assert v in generator.valid_values
+    for v in invalid:
+        assert v in generator.invalid_values
+
+
+@pytest.mark.parametrize(
+    'annotation, kind',
+    [
+        (Annotated[float, at.Gt(0)], float),
+        (Annotated[float, at.Interval(gt=0, lt=10), at.MultipleOf(3)], float),
+        (Annotated[int, at.Gt(0.5)], int),
+        (Annotated[int, at.Interval(ge=0.5, le=10.5), at.MultipleOf(0.5)], int),
+        (Annotated[Decimal, at.Lt(1.5)], Decimal),
+        (Annotated[datetime, at.Gt(date(2000, 1, 1))], date),  # a datetime can't be compared with a date
+    ],
+)
+def test_base_type(annotation: object, kind: type) -> None:
+    generator = ValueGenerator.from_annotation(annotation)
+    assert generator.valid_values
+    assert all(type(v) is kind for v in generator.valid_values)
+
+
+def test_container_items() -> None:
+    generator = ValueGenerator.from_annotation(Annotated[list[datetime], at.MinLen(1)])
+    assert [datetime(2000, 1, 1)] in generator.valid_values
+    assert all(isinstance(item, datetime) for v in generator.valid_values for item in v)
+    generator = ValueGenerator.from_annotation(Annotated[dict[str, float], at.Len(2, 2)])
+    assert generator.valid_values == ({'0': 0.0, '1': 0.0},)
+
+
+def test_max_length() -> None:
+    generator = ValueGenerator.from_annotation(Annotated[str, at.MaxLen(10**9)])
+    assert max(len(v) for v in generator.valid_values) <= MAX_LENGTH
+    assert not generator.invalid_values
+
+
+def test_timezone() -> None:
+    generator = ValueGenerator.from_annotation(Annotated[datetime, at.Timezone(...)])
+    assert all(v.tzinfo is not None for v in generator.valid_values)
+    assert all(v.tzinfo is None for v in generator.invalid_values)
+    assert generator.invalid_values
+
+
+def test_generate() -> None:
+    tp = Annotated[int, at.Interval(gt=0, le=100)]
+    values = generate(tp, 1000, seed=42)
+    assert len(values) == 1000
+    assert values == generate(tp, 1000, seed=42)
+    assert all(0 < v <= 100 for v in values)
+    assert not any(0 < v <= 100 for v in generate(tp, 1000, valid=False, seed=42))
+
+
+def test_iter_values() -> None:
+    stream = iter_values(Annotated[str, at.MaxLen(3)], seed=0, batch_size=10)
+    values = [next(stream) for _ in range(25)]
+    assert all(len(v) <= 3 for v in values)
+
+
+def test_random_interior() -> None:
+    tp = Annotated[float, at.Interval(ge=0, le=1)]
+    values = generate(tp, 200, seed=1)
+    edges = set(ValueGenerator.from_annotation(tp).valid_values)
+    assert all(validator(tp)(v) for v in values)
+    assert len({v for v in values if v not in edges}) > 50
+    assert ValueGenerator.from_annotation(tp).sample(200, rng=random.Random(1)) == values
+
+    multiples = generate(Annotated[int, at.Interval(ge=0, lt=100), at.MultipleOf(7)], 200, seed=1)
+    assert all(0 <= v < 100 and v % 7 == 0 for v in multiples)
+    assert len(set(multiples)) > 5
+
+
+def test_midpoint_of_coerced_bounds() -> None:
+    assert 0.5 in ValueGenerator.from_annotation(Annotated[float, at.Interval(ge=0, le=1)]).valid_values
+
+
+def test_overflowing_bound() -> None:
+    generator = ValueGenerator.from_annotation(Annotated[float, at.Ge(10**400)])
+    assert generator.valid_values == (math.inf,)
+    assert generator.random_range is None
+    assert generate(Annotated[float, at.Ge(10**400)], 3) == [math.inf] * 3
+
+
+def test_no_candidates() -> None:
+    with pytest.raises(ValueError, match='could not generate invalid values'):
+        generate(Annotated[int, at.doc('no constraints')], 10, valid=False)
@@ -0,0 +1,215 @@
+import math
+import threading
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Annotated, Any, get_args
+from unittest.mock import patch
+
+import pytest
+
+import annotated_types as at
+from annotated_types import plan
+from annotated_types.test_cases import Case, cases
+
+
+def test_flatten() -> None:
+    tp = Annotated[int, at.Interval(gt=1, le=5), at.doc('a number'), at.Len(2), slice(1, 3)]
+    assert plan.flatten(tp) == (at.Gt(1), at.Le(5), at.MinLen(2), at.MinLen(1), at.MaxLen(3))
+    assert plan.flatten(int) == ()
+
+
+unsupported: Any = object()
+
+
+def serializable_annotations() -> list[object]:
+    annotations = []
+    for case in cases():
+        try:
+            plan.dumps(plan.flatten(case.annotation))
+        except TypeError:
+            continue
+        annotations.append(case.annotation)
+    return annotations
+
+
+@pytest.mark.parametrize('annotation', serializable_annotations())
+def test_roundtrip(annotation: object) -> None:
+    constraints = plan.flatten(annotation)
+    assert plan.loads(plan.dumps(constraints)) == constraints
+
+
+def test_roundtrip_values() -> None:
+    constraints = (
+        at.Gt(Decimal('1.5')),
+        at.Ge(datetime(2000, 1, 1, tzinfo=timezone.utc)),
+        at.Lt(math.inf),
+        at.Timezone(...),
+        at.Predicate(at.Not(math.isnan)),
+        at.Unit('m/s'),
+    )
+    assert plan.loads(plan.dumps(constraints)) == constraints
+
+
+@pytest.mark.parametrize('constraint', [at.Predicate(lambda x: x > 0), at.Gt(unsupported), at.Timezone(unsupported)])
+def test_dumps_unsupported(constraint: at.BaseMetadata) -> None:
+    with pytest.raises(TypeError):
+        plan.dumps((constraint,))
+
+
+@pytest.mark.parametrize(
+    'data',
+    [
+        b'',
+        b'not json',
+        b'[1, "0.0.0", []]',
+        b'[1]',
+        b'[1, "%s", [["Nope", 1]]]',
+        b'[1, "%s", [["Predicate", 5]]]',
+        b'[1, "%s", [["Predicate", "str.nope"]]]',
+        b'[1, "%s", [["MinLen", "x"]]]',
+        b'[1, "%s", [["MaxLen", -1]]]',
+        b'[1, "%s", [["Unit", 1]]]',
+        b'[1, "%s", [["Gt", [1]]]]',
+        b'[1, "%s", [["Gt", {"decimal": "x"}]]]',
+        b'[1, "%s", [["Gt", {"date": 1}]]]',
+        b'[1, "%s", [["Timezone", 1]]]',
+        b'[1, "%s", [[["Gt"], 1]]]',
+        b'[1, "%s", [1]]',
+    ],
+)
+def test_loads_invalid(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        plan.loads(data.replace(b'%s', at.__version__.encode()))
+
+
+def test_flatten_grouped_metadata() -> None:
+    class Group:
+        __is_annotated_types_grouped_metadata__ = True
+
+        def __iter__(self) -> Iterator[object]:
+            yield at.Gt(1)
+            yield at.Len(0, 2)
+
+    assert plan.flatten(Annotated[int, Group(), at.Interval]) == (at.Gt(1), at.MaxLen(2))
+
+
+def test_plan_cache() -> None:
+    tp = Annotated[int, at.Gt(1), at.Predicate(str.isdigit)]
+    cache = plan.PlanCache()
+    assert cache.get(tp) == plan.flatten(tp)
+    with patch.object(plan, 'flatten', side_effect=AssertionError):
+        assert cache.get(tp) is cache.get(tp)
+    cache.clear()
+    assert cache.get(tp) == plan.flatten(tp)
+
+    unhashable = Annotated[float, at.Predicate(at.Not(math.isnan))]
+    assert cache.get(unhashable) == plan.flatten(unhashable)
+
+
+def test_plan_cache_maxsize() -> None:
+    annotations = [Annotated[int, at.Gt(i)] for i in range(5)]
+    cache = plan.PlanCache(maxsize=3)
+    for tp in annotations:
+        cache.get(tp)
+    assert len(cache) == 3
+    with patch.object(plan, 'flatten', side_effect=AssertionError):
+        assert [cache.get(tp) for tp in annotations[2:]] == [(at.Gt(i),) for i in range(2, 5)]
+    with pytest.raises(ValueError, match='maxsize must be positive'):
+        plan.PlanCache(maxsize=0)
+
+
+@pytest.mark.parametrize('case', list(cases()), ids=lambda case: str(case.annotation))
+def test_validator(case: Case) -> None:
+    check = plan.validator(case.annotation)
+    assert all(check(v) for v in case.valid_cases)
+    assert not any(check(v) for v in case.invalid_cases)
+
+
+def test_validator_cached() -> None:
+    tp = Annotated[int, at.Gt(1)]
+    assert plan.validator(tp) is plan.validator(tp)
+    unhashable = Annotated[float, at.Predicate(at.Not(math.isnan))]
+    assert plan.validator(unhashable)(1.0)
+
+    check = plan.validator(tp)
+    plan.clear_validator_cache()
+    assert plan.validator(tp) is not check
+
+
+def test_validator_type_error() -> None:
+    assert plan.validator(Annotated[int, at.Gt(1)])('2') is False
+
+
+def test_validate_many() -> None:
+    values = list(range(-50, 50))
+    expected = [v > 0 and v % 3 == 0 for v in values]
+    tp = Annotated[int, at.Gt(0), at.MultipleOf(3)]
+    assert plan.validate_many(tp, values) == expected
+    assert plan.validate_many(tp, values, chunk_size=7, max_workers=4) == expected
+    with pytest.raises(ValueError, match='chunk_size must be positive'):
+        plan.validate_many(tp, values, chunk_size=0)
+
+
+def test_thread_stress() -> None:
+    annotations = [Annotated[int, at.Gt(i), at.Lt(i + 10)] for i in range(20)]
+    cache = plan.PlanCache()
+    barrier = threading.Barrier(16)
+    errors: list[BaseException] = []
+
+    def hammer(seed: int) -> None:
+        try:
+            barrier.wait()
+            for n in range(500):
+                tp = annotations[(seed + n) % len(annotations)]
+                assert cache.get(tp) == plan.flatten(tp)
+                assert plan.validator(tp)(get_args(tp)[1].gt + 1)
+        except BaseException as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len({id(plan.validator(tp)) for tp in annotations}) == len(annotations)
+    assert all(cache.get(tp) is cache.get(tp) for tp in annotations)
+
+
+def test_collect_failures() -> None:
+    tp = Annotated[int, at.Gt(0), at.Predicate(str.isdigit), at.MultipleOf(3)]
+    check = plan.validator(Annotated[int, at.Gt(0), at.MultipleOf(3)])
+    report = check.collect_failures([3, -3, 4, '6', 6])
+    assert list(report.indices) == [1, 2, 3]
+    assert list(report.constraint_ids) == [0, 1, 0]
+    assert list(report.reasons) == [plan.FAILED, plan.FAILED, plan.ERRORED]
+    assert report.counts() == [2, 1]
+    assert list(report.messages()) == [
+        'value 1 failed Gt(gt=0)',
+        'value 2 failed MultipleOf(multiple_of=3)',
+        'value 3 could not be checked against Gt(gt=0)',
+    ]
+
+    report = plan.validator(tp).collect_failures([-1, 6], all_constraints=True)
+    assert list(report.indices) == [0, 0, 0, 1]
+    assert list(report.constraint_ids) == [0, 1, 2, 1]
+    assert list(report.reasons) == [plan.FAILED, plan.ERRORED, plan.FAILED, plan.ERRORED]
+    assert report.message(2) == 'value 0 failed MultipleOf(multiple_of=3)'
+
+
+def test_collect_failures_errors() -> None:
+    def positive(s: str) -> bool:
+        return int(s) > 0
+
+    erroring = [
+        (Annotated[int, at.MultipleOf(0)], 3),
+        (Annotated[str, at.Predicate(positive)], 'x'),
+        (Annotated[Decimal, at.Gt(0)], Decimal('nan')),
+    ]
+    for tp, value in erroring:
+        check = plan.validator(tp)
+        assert check(value) is False
+        report = check.collect_failures([value, value])
+        assert list(report.reasons) == [plan.ERRORED, plan.ERRORED]
@@ -0,0 +1,83 @@
+from array import array
+
+import pytest
+
+from annotated_types import Unit
+from annotated_types.units import ParsedUnit, conversion_factor, convert, convert_array, is_compatible, parse_unit
+
+VELOCITY = (1, 0, -1, 0, 0, 0, 0)
+FORCE = (1, 1, -2, 0, 0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    'unit, dimensions, scale',
+    [
+        ('m', (1, 0, 0, 0, 0, 0, 0), 1.0),
+        ('kg', (0, 1, 0, 0, 0, 0, 0), 1.0),
+        ('m/s', VELOCITY, 1.0),
+        ('km/h', VELOCITY, 1 / 3.6),
+        ('m / s', VELOCITY, 1.0),
+        ('m.s-1', VELOCITY, 1.0),
+        ('N', FORCE, 1.0),
+        ('kg m s^-2', FORCE, 1.0),
+        ('kg*m/s**2', FORCE, 1.0),
+        ('kg·m/(s·s)', FORCE, 1.0),
+        ('m2', (2, 0, 0, 0, 0, 0, 0), 1.0),
+        ('1/s', (0, 0, -1, 0, 0, 0, 0), 1.0),
+        ('hPa', (-1, 1, -2, 0, 0, 0, 0), 100.0),
+        ('µs', (0, 0, 1, 0, 0, 0, 0), 1e-6),
+        ('dam', (1, 0, 0, 0, 0, 0, 0), 10.0),
+        ('min', (0, 0, 1, 0, 0, 0, 0), 60.0),
+        ('kWh', (2, 1, -2, 0, 0, 0, 0), 3.6e6),
+        ('mAh', (0, 0, 1, 1, 0, 0, 0), 3.6),
+        ('', (0, 0, 0, 0, 0, 0, 0), 1.0),
+        ('[time]', (0, 0, 1, 0, 0, 0, 0), None),
+        ('[length]/[time]', VELOCITY, None),
+        ('m/[time]', VELOCITY, None),
+    ],
+)
+def test_parse_unit(unit: str, dimensions: tuple[int, ...], scale: 'float | None') -> None:
+    parsed = parse_unit(unit)
+    assert parsed.dimensions == dimensions
+    assert parsed.scale == pytest.approx(scale)
+    assert parse_unit(Unit(unit)) is parsed
+
+
+@pytest.mark.parametrize(
+    'unit', ['xyz', 'm^', 'm^x', 'm/', '(m', 'm)', '[colour]', 'm % s', '2m', 'degC', 'Nm', 'm 2', 'm.s -1']
+)
+def test_parse_unit_invalid(unit: str) -> None:
+    with pytest.raises(ValueError):
+        parse_unit(unit)
+
+
+def test_is_compatible() -> None:
+    assert is_compatible(Unit('m/s'), Unit('km/h'))
+    assert is_compatible('m/s', '[length]/[time]')
+    assert not is_compatible('m/s', 'm')
+
+
+def test_conversion_factor() -> None:
+    assert conversion_factor(Unit('km/h'), Unit('m/s')) == pytest.approx(1 / 3.6)
+    assert conversion_factor('mi', 'ft') == pytest.approx(5280)
+    with pytest.raises(ValueError, match='dimensions differ'):
+        conversion_factor('m', 's')
+    with pytest.raises(ValueError, match='without a scale'):
+        conversion_factor('m/s', '[length]/[time]')
+
+
+def test_convert() -> None:
+    assert convert([1, 2.5], 'km', 'm') == [1000, 2500]
+    assert convert(iter([1.0]), 'kW h', 'J') == [pytest.approx(3.6e6)]
+
+
+def test_convert_array() -> None:
+    converted = convert_array(array('d', [3600.0]), Unit('s'), Unit('h'))
+    assert converted == array('d', [1.0])
+    assert convert_array(array('f', [1.0]), 'km', 'm').typecode == 'f'
+
+
+def test_parsed_unit_arithmetic() -> None:
+    assert parse_unit('m') * parse_unit('s') ** -1 == parse_unit('m/s')
+    assert (parse_unit('[time]') * parse_unit('s')).scale is None
+    assert isinstance(parse_unit('m'), ParsedUnit)